@@ -1,58 +1,667 @@
 from __future__ import annotations
 
+import atexit
+import functools
+import inspect
+import io
+import logging
+import math
+import mmap
 import os
+import posixpath
+import re
+import threading
+import xml.etree.ElementTree as ET
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterator
 
 from mcp.server.fastmcp import FastMCP
 from openpyxl import Workbook, load_workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE, KNOWN_TYPES, Cell
 from openpyxl.styles import Alignment, Font, PatternFill
-from openpyxl.utils.cell import range_boundaries
+from openpyxl.utils.cell import coordinate_to_tuple, get_column_letter, range_boundaries
+from openpyxl.utils.exceptions import IllegalCharacterError
 from openpyxl.worksheet.worksheet import Worksheet
 
 mcp = FastMCP("excel-mcp")
-ALLOWED_EXTENSIONS = {".xlsx", ".xlsm"}
+_LOGGER = logging.getLogger(__name__)
+ALLOWED_EXTENSIONS = frozenset({".xlsx", ".xlsm"})
+WORKBOOK_CACHE_SIZE = 8
+MMAP_LOAD_THRESHOLD = 1 << 20
+_NUMERIC_TYPES = frozenset({int, float})
+_HEX_COLOR_RE = re.compile(r"[0-9A-Fa-f]{6}")
+_INVALID_SHEET_CHARS_RE = re.compile(r"[\[\]:*?/\\]")
+_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+# A formula element (<f>, optionally prefixed) anywhere in a worksheet part.
+_SHEET_FORMULA_RE = re.compile(rb"<(?:\w+:)?f[\s>/]")
 
+# Live workbooks keyed by resolved path: (workbook, dirty, mtime_ns at last load/save).
+_WB_CACHE: OrderedDict[Path, tuple[Workbook, bool, int | None]] = OrderedDict()
+# _WB_LOCK guards the cache bookkeeping only; each workbook is used under its own path lock.
+_WB_LOCK = threading.RLock()
+_PATH_LOCKS: dict[Path, threading.RLock] = {}
+_SAVE_TIMER: threading.Timer | None = None
 
-def _workspace_root() -> Path:
-    env_root = os.environ.get("EXCEL_MCP_ROOT")
+
+class WorkbookConflictError(RuntimeError):
+    """The file changed on disk while its cached workbook had unsaved edits."""
+
+    def __init__(self, path: Path) -> None:
+        super().__init__(
+            f"Workbook changed on disk while edits were pending: {path}; "
+            "call flush with discard=True to drop the pending edits"
+        )
+
+
+@functools.lru_cache(maxsize=8)
+def _resolve_workspace_root(env_root: str, cwd: str) -> Path:
     if env_root:
         return Path(env_root).expanduser().resolve()
-    return Path.cwd().resolve()
+    return Path(cwd).resolve()
+
+
+def _workspace_root() -> Path:
+    # Keyed on the raw setting so resolve() (one readlink per component) runs once per root.
+    return _resolve_workspace_root(os.environ.get("EXCEL_MCP_ROOT", ""), os.getcwd())
+
+
+def set_workspace_root(root: str | None) -> Path:
+    """Change the workspace root for this process (None falls back to the working directory).
+
+    Deliberately not an MCP tool: the root is the security boundary chosen by whoever runs
+    the server, not something a client should be able to move.
+    """
+    if root:
+        os.environ["EXCEL_MCP_ROOT"] = root
+    else:
+        os.environ.pop("EXCEL_MCP_ROOT", None)
+    _resolve_workspace_root.cache_clear()
+    _path_checker.cache_clear()
+    return _workspace_root()
+
+
+@functools.lru_cache(maxsize=8)
+def _path_checker(workspace_root: Path) -> Callable[[str], Path]:
+    """Build the _safe_path checks for one workspace root, with the root and messages bound once."""
+    allowed_extensions = ALLOWED_EXTENSIONS
+    outside_message = f"file_path must be inside workspace: {workspace_root}"
+    extension_message = f"Only {sorted(allowed_extensions)} files are supported"
+
+    def check(file_path: str) -> Path:
+        candidate = Path(file_path).expanduser().resolve()
+        if not candidate.is_relative_to(workspace_root):
+            raise ValueError(outside_message)
+        if candidate.suffix.lower() not in allowed_extensions:
+            raise ValueError(extension_message)
+        if candidate.is_dir():
+            raise ValueError("file_path must point to a file, not a directory")
+        return candidate
+
+    return check
 
 
 def _safe_path(file_path: str) -> Path:
-    candidate = Path(file_path).expanduser().resolve()
-    workspace_root = _workspace_root()
-    if workspace_root not in candidate.parents and candidate != workspace_root:
-        raise ValueError(f"file_path must be inside workspace: {workspace_root}")
-    if candidate.suffix.lower() not in ALLOWED_EXTENSIONS:
-        raise ValueError(f"Only {sorted(ALLOWED_EXTENSIONS)} files are supported")
-    if candidate.exists() and candidate.is_dir():
-        raise ValueError("file_path must point to a file, not a directory")
-    return candidate
+    return _path_checker(_workspace_root())(file_path)
+
+
+def _unsafe_save() -> bool:
+    return os.environ.get("EXCEL_MCP_UNSAFE_SAVE", "").strip().lower() in {"1", "true", "yes"}
+
+
+def _write_atomic(path: Path, data: bytes | memoryview) -> None:
+    """Write data to a temporary file next to path and rename it into place.
+
+    The data is fdatasync'ed before the rename unless EXCEL_MCP_UNSAFE_SAVE=1, which trades
+    crash safety for speed on scratch files.
+    """
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        try:
+            view = memoryview(data)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+            if not _unsafe_save():
+                getattr(os, "fdatasync", os.fsync)(fd)
+            if path.exists():
+                os.chmod(fd, path.stat().st_mode & 0o7777)
+        finally:
+            os.close(fd)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def _save_workbook(wb: Workbook, path: Path) -> None:
+    # Serialize in memory so the file is written once instead of through many small zip writes.
+    buf = io.BytesIO()
+    wb.save(buf)
+    _write_atomic(path, buf.getbuffer())
+
+
+def _load(path: Path, *, for_write: bool) -> Workbook:
+    """Open an existing workbook, parsing only what the caller can use.
+
+    Reads stream the file read-only and skip external links and VBA. Writes keep both, since
+    anything not loaded is dropped when the workbook is saved.
+    """
+    if not for_write:
+        return load_workbook(path, read_only=True, keep_links=False, keep_vba=False)
+    keep_vba = path.suffix.lower() == ".xlsm"
+    if path.stat().st_size > MMAP_LOAD_THRESHOLD:
+        # One mapped copy up front instead of many small buffered reads while unzipping parts.
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return load_workbook(io.BytesIO(mm), keep_links=True, keep_vba=keep_vba)
+    return load_workbook(path, keep_links=True, keep_vba=keep_vba)
 
 
 def _load_or_create_workbook(path: Path, create_if_missing: bool) -> Workbook:
     if path.exists():
-        return load_workbook(path)
+        return _load(path, for_write=True)
     if not create_if_missing:
         raise FileNotFoundError(f"Workbook not found: {path}")
 
     path.parent.mkdir(parents=True, exist_ok=True)
     wb = Workbook()
-    wb.save(path)
+    _save_workbook(wb, path)
     return wb
 
 
+def _file_mtime(path: Path) -> int | None:
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _save_delay() -> float:
+    return float(os.environ.get("EXCEL_MCP_SAVE_DELAY", "1.0"))
+
+
+def _path_lock(path: Path) -> threading.RLock:
+    with _WB_LOCK:
+        lock = _PATH_LOCKS.get(path)
+        if lock is None:
+            lock = _PATH_LOCKS[path] = threading.RLock()
+        return lock
+
+
+def _cached_workbook(path: Path) -> Workbook | None:
+    """Return the cached workbook for path, or None if there is none or the file changed.
+
+    Raises WorkbookConflictError if the file changed under unsaved edits, rather than letting
+    the caller read or reload the disk copy over them.
+    """
+    with _WB_LOCK:
+        entry = _WB_CACHE.get(path)
+        if entry is None:
+            return None
+        if entry[2] != _file_mtime(path):
+            if entry[1]:
+                raise WorkbookConflictError(path)
+            return None
+        _WB_CACHE.move_to_end(path)
+        return entry[0]
+
+
+def _get_wb(path: Path, create_if_missing: bool) -> Workbook:
+    """Return the cached workbook for path, reloading it if the file changed on disk.
+
+    A changed file with unsaved edits pending raises WorkbookConflictError instead.
+    The caller must hold _path_lock(path).
+    """
+    wb = _cached_workbook(path)
+    if wb is not None:
+        return wb
+    wb = _load_or_create_workbook(path, create_if_missing=create_if_missing)
+    with _WB_LOCK:
+        _WB_CACHE[path] = (wb, False, _file_mtime(path))
+        _WB_CACHE.move_to_end(path)
+    _evict_overflow(keep=path)
+    return wb
+
+
+def _evict_overflow(keep: Path) -> None:
+    """Save and drop least recently used workbooks beyond WORKBOOK_CACHE_SIZE.
+
+    Workbooks that another call is using, or whose file changed under unsaved edits, are
+    skipped rather than waited on or overwritten.
+    """
+    with _WB_LOCK:
+        overflow = len(_WB_CACHE) - WORKBOOK_CACHE_SIZE
+        candidates = [p for p in _WB_CACHE if p != keep]
+    for old_path in candidates:
+        if overflow <= 0:
+            return
+        lock = _path_lock(old_path)
+        if not lock.acquire(blocking=False):
+            continue
+        try:
+            try:
+                _save_if_dirty(old_path)
+            except WorkbookConflictError:
+                continue
+            with _WB_LOCK:
+                if _WB_CACHE.pop(old_path, None) is not None:
+                    overflow -= 1
+        finally:
+            lock.release()
+
+
+@contextmanager
+def _workbook(path: Path, create_if_missing: bool, *, atomic: bool = False) -> Iterator[Workbook]:
+    """Hold the workbook's lock around one tool call and keep a failed call from leaving edits behind.
+
+    Each edit impl validates its arguments before changing anything, so a single failing edit
+    leaves the workbook as it was. atomic=True is for several edits that must succeed or fail
+    together: a workbook with pending edits is then copied in memory first and restored from
+    that copy on failure. A workbook that had no pending edits is dropped on failure instead,
+    so the next call reloads the file.
+    """
+    with _path_lock(path):
+        wb = _get_wb(path, create_if_missing=create_if_missing)
+        with _WB_LOCK:
+            _, dirty, mtime = _WB_CACHE[path]
+        snapshot = None
+        if atomic and dirty:
+            snapshot = io.BytesIO()
+            wb.save(snapshot)
+        try:
+            yield wb
+        except BaseException:
+            if snapshot is not None:
+                snapshot.seek(0)
+                restored = load_workbook(snapshot, keep_links=True, keep_vba=path.suffix.lower() == ".xlsm")
+                with _WB_LOCK:
+                    _WB_CACHE[path] = (restored, True, mtime)
+            else:
+                with _WB_LOCK:
+                    if not dirty:
+                        _WB_CACHE.pop(path, None)
+            raise
+
+
+@contextmanager
+def _read_workbook(path: Path, sheet_name: str | None, create_if_missing: bool) -> Iterator[Workbook]:
+    """Yield the cached workbook if there is one, otherwise stream the file in read-only mode.
+
+    Read-only workbooks cannot create sheets, so a missing sheet_name with create_if_missing
+    goes through the regular cached workbook instead.
+    """
+    with _path_lock(path):
+        if _cached_workbook(path) is None and path.exists():
+            wb = _load(path, for_write=False)
+            try:
+                if sheet_name is None or sheet_name in wb.sheetnames or not create_if_missing:
+                    yield wb
+                    return
+            finally:
+                wb.close()
+        with _workbook(path, create_if_missing=create_if_missing) as wb:
+            yield wb
+
+
+def _zip_sheet_names(path: Path) -> list[str] | None:
+    """Read sheet names from xl/workbook.xml alone, without parsing the rest of the package.
+
+    Returns None when the file does not have the usual layout, so callers can fall back to openpyxl.
+    """
+    try:
+        with zipfile.ZipFile(path) as archive, archive.open("xl/workbook.xml") as workbook_xml:
+            names = []
+            for _, elem in ET.iterparse(workbook_xml, events=("end",)):
+                tag = elem.tag.rpartition("}")[2]
+                if tag == "sheet":
+                    names.append(elem.get("name"))
+                elif tag == "sheets":
+                    break
+    except (KeyError, OSError, ET.ParseError, zipfile.BadZipFile):
+        return None
+    return names or None
+
+
+def _zip_sheet_part(archive: zipfile.ZipFile, sheet_name: str) -> str | None:
+    """Return the archive member holding sheet_name's XML, following the workbook relationships."""
+    rel_id = None
+    with archive.open("xl/workbook.xml") as workbook_xml:
+        for _, elem in ET.iterparse(workbook_xml, events=("end",)):
+            if elem.tag.rpartition("}")[2] == "sheet" and elem.get("name") == sheet_name:
+                rel_id = elem.get(f"{{{_REL_NS}}}id")
+                break
+    if rel_id is None:
+        return None
+    rels = ET.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    for rel in rels.iter(f"{{{_PKG_REL_NS}}}Relationship"):
+        if rel.get("Id") == rel_id:
+            target = rel.get("Target", "")
+            if target.startswith("/"):
+                return target.lstrip("/")
+            return posixpath.normpath(posixpath.join("xl", target))
+    return None
+
+
+def _set_cell_xml(root: Any, row: int, col: int, value: int | float | bool | None) -> bool:
+    """Set one cell's value in a parsed worksheet element, keeping its style.
+
+    Returns False for layouts this does not handle (formula cells, rows or cells without an r
+    attribute), leaving root untouched.
+    """
+    ns = root.tag.rpartition("}")[0] + "}"
+    if root.tag != f"{ns}worksheet":
+        return False
+    sheet_data = root.find(f"{ns}sheetData")
+    if sheet_data is None:
+        return False
+    coordinate = f"{get_column_letter(col)}{row}"
+
+    row_elem = None
+    row_before = None
+    for candidate in sheet_data.iterfind(f"{ns}row"):
+        r = candidate.get("r")
+        if r is None:
+            return False
+        if int(r) == row:
+            row_elem = candidate
+            break
+        if int(r) > row:
+            row_before = candidate
+            break
+
+    cell_elem = None
+    cell_before = None
+    if row_elem is not None:
+        for candidate in row_elem.iterfind(f"{ns}c"):
+            r = candidate.get("r")
+            if r is None:
+                return False
+            if r == coordinate:
+                cell_elem = candidate
+                break
+            if coordinate_to_tuple(r)[1] > col:
+                cell_before = candidate
+                break
+    if cell_elem is not None and cell_elem.find(f"{ns}f") is not None:
+        return False
+    if cell_elem is None and value is None:
+        return True
+
+    if row_elem is None:
+        row_elem = root.makeelement(f"{ns}row", {"r": str(row)})
+        if row_before is None:
+            sheet_data.append(row_elem)
+        else:
+            row_before.addprevious(row_elem)
+    if cell_elem is None:
+        cell_elem = root.makeelement(f"{ns}c", {"r": coordinate})
+        if cell_before is None:
+            row_elem.append(cell_elem)
+        else:
+            cell_before.addprevious(cell_elem)
+        # spans is an optional hint that may no longer cover the row.
+        row_elem.attrib.pop("spans", None)
+
+    for child in list(cell_elem):
+        cell_elem.remove(child)
+    if value is None:
+        cell_elem.attrib.pop("t", None)
+        return True
+    if isinstance(value, bool):
+        cell_elem.set("t", "b")
+        text = "1" if value else "0"
+    else:
+        cell_elem.set("t", "n")
+        text = repr(value)
+    v = root.makeelement(f"{ns}v", {})
+    v.text = text
+    cell_elem.append(v)
+
+    dimension = root.find(f"{ns}dimension")
+    if dimension is not None and dimension.get("ref"):
+        min_col, min_row, max_col, max_row = range_boundaries(dimension.get("ref"))
+        if None not in (min_col, min_row, max_col, max_row):
+            min_col, max_col = min(min_col, col), max(max_col, col)
+            min_row, max_row = min(min_row, row), max(max_row, row)
+            dimension.set("ref", f"{get_column_letter(min_col)}{min_row}:{get_column_letter(max_col)}{max_row}")
+    return True
+
+
+def _write_cell_in_place(path: Path, sheet_name: str, cell: str, value: int | float | bool | None) -> bool:
+    """Rewrite the target sheet's XML to set a numeric, boolean or empty value, bypassing openpyxl.
+
+    Every other archive member is recompressed unchanged, so this still costs O(workbook) in
+    zlib work and one full save; it only skips openpyxl's parse and serialization. Strings
+    would change the shared strings table, so callers only use this for scalar non-string
+    values. Returns False whenever the regular openpyxl path is needed instead: lxml is
+    missing, the sheet does not exist or declares a DOCTYPE, or the workbook has formulas,
+    whose cached results could depend on the cell and would be left stale.
+    """
+    if isinstance(value, float) and not math.isfinite(value):
+        return False
+    try:
+        from lxml import etree
+    except ImportError:
+        return False
+    row, col = coordinate_to_tuple(cell)
+    try:
+        with zipfile.ZipFile(path) as archive:
+            part = _zip_sheet_part(archive, sheet_name)
+            if part is None or part not in archive.namelist():
+                return False
+            members = [(info, archive.read(info)) for info in archive.infolist()]
+            if any(
+                info.filename == "xl/calcChain.xml"
+                or (info.filename.startswith("xl/worksheets/") and _SHEET_FORMULA_RE.search(data))
+                for info, data in members
+            ):
+                return False
+            # Never expand entities or fetch anything: a crafted sheet could otherwise pull
+            # another file's contents into the workbook.
+            parser = etree.XMLParser(resolve_entities=False, no_network=True, load_dtd=False)
+            root = etree.fromstring(archive.read(part), parser)
+            if root.getroottree().docinfo.doctype or not _set_cell_xml(root, row, col, value):
+                return False
+            buf = io.BytesIO()
+            with zipfile.ZipFile(buf, "w") as out:
+                for info, data in members:
+                    if info.filename == part:
+                        data = etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+                    out.writestr(info, data)
+    except (KeyError, ET.ParseError, etree.XMLSyntaxError, zipfile.BadZipFile):
+        return False
+    _write_atomic(path, buf.getbuffer())
+    return True
+
+
+def _reader() -> str:
+    return os.environ.get("EXCEL_MCP_READER", "openpyxl").strip().lower()
+
+
+def _load_calamine(path: Path) -> Any:
+    try:
+        from python_calamine import CalamineWorkbook
+    except ImportError as exc:
+        raise RuntimeError("EXCEL_MCP_READER=calamine requires the python-calamine package") from exc
+    return CalamineWorkbook.from_path(str(path))
+
+
+def _read_calamine(path: Path, sheet_name: str, bounds: _Bounds) -> list[list[Any]] | None:
+    """Read a range with python-calamine, parsing only the requested sheet.
+
+    Returns None if the sheet does not exist. Empty cells come back as None, as with openpyxl.
+    """
+    min_col, min_row, max_col, max_row = bounds
+    wb = _load_calamine(path)
+    try:
+        if sheet_name not in wb.sheet_names:
+            return None
+        sheet = wb.get_sheet_by_name(sheet_name)
+        if max_row is not None:
+            rows = sheet.to_python(skip_empty_area=False, nrows=max_row)
+        else:
+            rows = sheet.to_python(skip_empty_area=False)
+    finally:
+        wb.close()
+
+    # Open sides close against the data, and an empty side still spans one row or column,
+    # matching the openpyxl paths.
+    min_row, min_col = min_row or 1, min_col or 1
+    max_row = max_row or len(rows) or 1
+    max_col = max_col or max((len(row) for row in rows), default=0) or 1
+    values = []
+    for r in range(min_row - 1, max_row):
+        row = rows[r] if r < len(rows) else []
+        values.append([row[c] if c < len(row) and row[c] != "" else None for c in range(min_col - 1, max_col)])
+    return values
+
+
+def _save_if_dirty(path: Path) -> bool:
+    """Save the cached workbook for path if it has pending edits. The caller must hold _path_lock(path).
+
+    Raises WorkbookConflictError instead of overwriting a file that changed since it was loaded.
+    """
+    with _WB_LOCK:
+        entry = _WB_CACHE.get(path)
+    if entry is None or not entry[1]:
+        return False
+    if _file_mtime(path) != entry[2]:
+        raise WorkbookConflictError(path)
+    _save_workbook(entry[0], path)
+    with _WB_LOCK:
+        _WB_CACHE[path] = (entry[0], False, _file_mtime(path))
+    return True
+
+
+def _mark_dirty(path: Path, *, save_now: bool = False) -> bool:
+    """Record an edit to a cached workbook. Returns True if it was saved immediately.
+
+    save_now skips the debounce. The caller must hold _path_lock(path).
+    """
+    global _SAVE_TIMER
+    with _WB_LOCK:
+        wb, _, mtime = _WB_CACHE[path]
+        _WB_CACHE[path] = (wb, True, mtime)
+        delay = _save_delay()
+        if delay > 0 and not save_now:
+            if _SAVE_TIMER is not None:
+                _SAVE_TIMER.cancel()
+            _SAVE_TIMER = threading.Timer(delay, _flush_all)
+            _SAVE_TIMER.daemon = True
+            _SAVE_TIMER.start()
+            return False
+    return _save_if_dirty(path)
+
+
+def _flush_all() -> None:
+    with _WB_LOCK:
+        dirty_paths = [path for path, (_, dirty, _) in _WB_CACHE.items() if dirty]
+    for path in dirty_paths:
+        with _path_lock(path):
+            try:
+                _save_if_dirty(path)
+            except Exception:
+                # Runs on the timer thread and at exit, where nobody sees the error: log it, leave
+                # the workbook dirty for the next call or flush, and keep saving the others.
+                _LOGGER.exception("Could not save pending edits to %s", path)
+
+
+atexit.register(_flush_all)
+
+
 def _validate_sheet_name(sheet_name: str) -> None:
     if not sheet_name or len(sheet_name) > 31:
         raise ValueError("sheet_name must be 1-31 characters")
-    invalid_chars = set(r'[]:*?/\\')
-    if any(c in invalid_chars for c in sheet_name):
+    if _INVALID_SHEET_CHARS_RE.search(sheet_name):
         raise ValueError("sheet_name contains invalid characters: []:*?/\\")
 
 
+# (min_col, min_row, max_col, max_row) as returned by range_boundaries; open-ended sides are None.
+_Bounds = tuple[int | None, int | None, int | None, int | None]
+
+
+def _parse_range(cell_range: str) -> _Bounds:
+    """Parse cell_range once into its bounds, accepting corners in either order (C3:A1 is A1:C3)."""
+    try:
+        min_col, min_row, max_col, max_row = range_boundaries(cell_range)
+    except (TypeError, ValueError) as exc:
+        raise ValueError(f"cell_range is not a valid range like A1:C10: {cell_range!r}") from exc
+    if min_col is not None and max_col is not None and min_col > max_col:
+        min_col, max_col = max_col, min_col
+    if min_row is not None and max_row is not None and min_row > max_row:
+        min_row, max_row = max_row, min_row
+    return min_col, min_row, max_col, max_row
+
+
+def _resolve_bounds(bounds: _Bounds, ws: Any) -> tuple[int, int, int, int]:
+    """Close open-ended sides (A:A, 2:5) against the sheet's used area."""
+    min_col, min_row, max_col, max_row = bounds
+    return (
+        min_col or 1,
+        min_row or 1,
+        max_col or ws.max_column or 1,
+        max_row or ws.max_row or 1,
+    )
+
+
+def _check_value(value: Any) -> None:
+    """Raise the error openpyxl would raise for storing value in a cell, without touching one."""
+    if isinstance(value, str):
+        # openpyxl truncates to 32,767 characters before checking.
+        if ILLEGAL_CHARACTERS_RE.search(value, 0, 32767):
+            raise IllegalCharacterError(f"{value} cannot be used in worksheets.")
+    elif not isinstance(value, KNOWN_TYPES):
+        raise ValueError(f"Cannot convert {value!r} to Excel")
+
+
+def _check_rows(values: list[list[Any]]) -> None:
+    for row_values in values:
+        if not isinstance(row_values, (list, tuple)):
+            raise ValueError(f"values must be a list of rows, got row {row_values!r}")
+        if not _NUMERIC_TYPES.issuperset(map(type, row_values)):
+            for value in row_values:
+                _check_value(value)
+
+
+def _read_only_open_range(ws: Any, bounds: _Bounds) -> tuple[list[list[Any]], tuple[int, int, int, int]]:
+    """Read an open-ended range (A:A, 2:4) from a read-only sheet, returning values and closed bounds.
+
+    The stored <dimension> can be stale or missing, so open sides are closed against the sheet's
+    real extent like the cached workbook does: rows by streaming to the last row, columns by the
+    widest row in the whole sheet. Rows come back ragged; the caller pads them.
+    """
+    ws.reset_dimensions()
+    min_col, min_row, max_col, max_row = bounds
+    min_col, min_row = min_col or 1, min_row or 1
+    if max_col is not None:
+        values = [
+            list(row)
+            for row in ws.iter_rows(min_row=min_row, max_row=max_row, min_col=min_col, max_col=max_col, values_only=True)
+        ]
+        return values, (min_col, min_row, max_col, max_row or min_row + max(len(values), 1) - 1)
+
+    # Open columns: every row has to be seen to find the widest, so stream the whole sheet once.
+    values = []
+    width = last_row = 0
+    for last_row, row in enumerate(ws.iter_rows(values_only=True), start=1):
+        width = max(width, len(row))
+        if min_row <= last_row and (max_row is None or last_row <= max_row):
+            values.append(list(row[min_col - 1 :]))
+    return values, (min_col, min_row, max(width, min_col), max_row or max(last_row, min_row))
+
+
+def _normalize_hex_color(value: str) -> str:
+    color = value.strip().lstrip("#")
+    if not _HEX_COLOR_RE.fullmatch(color):
+        raise ValueError("fill_hex must be 6 hex characters, e.g. EAF2FF")
+    return color.upper()
+
+
 def _ensure_sheet(wb: Workbook, sheet_name: str, create_if_missing: bool) -> Worksheet:
     _validate_sheet_name(sheet_name)
     if sheet_name in wb.sheetnames:
@@ -66,8 +675,14 @@ def _ensure_sheet(wb: Workbook, sheet_name: str, create_if_missing: bool) -> Wor
 def list_sheets(file_path: str, create_if_missing: bool = False) -> dict[str, Any]:
     """List all sheet names in an Excel workbook."""
     path = _safe_path(file_path)
-    wb = _load_or_create_workbook(path, create_if_missing=create_if_missing)
-    return {"file_path": str(path), "sheets": wb.sheetnames, "workspace_root": str(_workspace_root())}
+    with _path_lock(path):
+        sheets = None
+        if _cached_workbook(path) is None and path.exists():
+            sheets = _zip_sheet_names(path)
+        if sheets is None:
+            with _read_workbook(path, sheet_name=None, create_if_missing=create_if_missing) as wb:
+                sheets = wb.sheetnames
+    return {"file_path": str(path), "sheets": sheets, "workspace_root": str(_workspace_root())}
 
 
 @mcp.tool()
@@ -79,11 +694,32 @@ def read_range(
 ) -> dict[str, Any]:
     """Read a range like A1:C10 and return values as a 2D array."""
     path = _safe_path(file_path)
-    wb = _load_or_create_workbook(path, create_if_missing=create_if_missing)
-    ws = _ensure_sheet(wb, sheet_name, create_if_missing=create_if_missing)
-
-    rows = ws[cell_range]
-    values = [[cell.value for cell in row] for row in rows]
+    bounds = _parse_range(cell_range)
+    values = None
+    with _path_lock(path):
+        if _reader() == "calamine" and _cached_workbook(path) is None and path.exists():
+            _validate_sheet_name(sheet_name)
+            values = _read_calamine(path, sheet_name, bounds)
+            if values is None and not create_if_missing:
+                raise ValueError(f"Sheet not found: {sheet_name}")
+        if values is None:
+            with _read_workbook(path, sheet_name=sheet_name, create_if_missing=create_if_missing) as wb:
+                ws = _ensure_sheet(wb, sheet_name, create_if_missing=create_if_missing)
+                if wb.read_only and None in bounds:
+                    values, (min_col, min_row, max_col, max_row) = _read_only_open_range(ws, bounds)
+                else:
+                    min_col, min_row, max_col, max_row = _resolve_bounds(bounds, ws)
+                    values = [
+                        list(row)
+                        for row in ws.iter_rows(
+                            min_row=min_row, max_row=max_row, min_col=min_col, max_col=max_col, values_only=True
+                        )
+                    ]
+            # Read-only sheets skip missing cells and rows; pad so the shape matches cell_range.
+            width = max_col - min_col + 1
+            for row in values:
+                row.extend([None] * (width - len(row)))
+            values.extend([None] * width for _ in range(max_row - min_row + 1 - len(values)))
 
     return {
         "file_path": str(path),
@@ -93,6 +729,27 @@ def read_range(
     }
 
 
+def _edit(
+    path: Path, create_workbook: bool, impl: Callable[..., dict[str, Any]], /, **arguments: Any
+) -> dict[str, Any]:
+    """Run one workbook operation against the cached workbook and record the edit."""
+    with _workbook(path, create_if_missing=create_workbook) as wb:
+        result = impl(wb, **arguments)
+        saved = _mark_dirty(path)
+    return {"file_path": str(path), **result, "saved": saved}
+
+
+def _write_cell_impl(
+    wb: Workbook, sheet_name: str, cell: str, value: Any, create_if_missing: bool = True
+) -> dict[str, Any]:
+    # Validate before _ensure_sheet so a bad call does not leave a new sheet behind.
+    coordinate_to_tuple(cell)
+    _check_value(value)
+    ws = _ensure_sheet(wb, sheet_name, create_if_missing=create_if_missing)
+    ws[cell] = value
+    return {"sheet_name": sheet_name, "cell": cell, "value": value}
+
+
 @mcp.tool()
 def write_cell(
     file_path: str,
@@ -103,18 +760,64 @@ def write_cell(
 ) -> dict[str, Any]:
     """Write one value into a single cell (for example B2)."""
     path = _safe_path(file_path)
-    wb = _load_or_create_workbook(path, create_if_missing=create_if_missing)
+    # Only worth it when every call is saved anyway; with a debounce the cached workbook
+    # absorbs repeated writes and saves once.
+    if (value is None or type(value) in (int, float, bool)) and _save_delay() <= 0:
+        _validate_sheet_name(sheet_name)
+        with _path_lock(path):
+            if (
+                _cached_workbook(path) is None
+                and path.exists()
+                and _write_cell_in_place(path, sheet_name, cell, value)
+            ):
+                return {"file_path": str(path), "sheet_name": sheet_name, "cell": cell, "value": value, "saved": True}
+
+    return _edit(
+        path,
+        create_if_missing,
+        _write_cell_impl,
+        sheet_name=sheet_name,
+        cell=cell,
+        value=value,
+        create_if_missing=create_if_missing,
+    )
+
+
+def _write_range_impl(
+    wb: Workbook, sheet_name: str, start_cell: str, values: list[list[Any]], create_if_missing: bool = True
+) -> dict[str, Any]:
+    start_row, start_col = coordinate_to_tuple(start_cell)
+    _check_rows(values)
     ws = _ensure_sheet(wb, sheet_name, create_if_missing=create_if_missing)
 
-    ws[cell] = value
-    wb.save(path)
+    # Populate the cell store directly: ws.cell() per value is the openpyxl hot path.
+    ws_cells = ws._cells
+    written_cells = 0
+    for row, row_values in enumerate(values, start=start_row):
+        if _NUMERIC_TYPES.issuperset(map(type, row_values)):
+            # Plain int/float rows are always numeric cells: skip openpyxl's per-value type inference.
+            for col, v in enumerate(row_values, start=start_col):
+                target = ws_cells.get((row, col))
+                if target is None:
+                    target = ws_cells[(row, col)] = Cell(ws, row=row, column=col)
+                target._value = v
+                target.data_type = "n"
+        else:
+            for col, v in enumerate(row_values, start=start_col):
+                existing = ws_cells.get((row, col))
+                if existing is None:
+                    ws_cells[(row, col)] = Cell(ws, row=row, column=col, value=v)
+                else:
+                    existing.value = v
+        written_cells += len(row_values)
+    if values:
+        ws._current_row = max(ws._current_row, start_row + len(values) - 1)
 
     return {
-        "file_path": str(path),
         "sheet_name": sheet_name,
-        "cell": cell,
-        "value": value,
-        "saved": True,
+        "start_cell": start_cell,
+        "rows": len(values),
+        "written_cells": written_cells,
     }
 
 
@@ -128,29 +831,79 @@ def write_range(
 ) -> dict[str, Any]:
     """Write a 2D array to sheet, starting at start_cell (for example A1)."""
     path = _safe_path(file_path)
-    wb = _load_or_create_workbook(path, create_if_missing=create_if_missing)
+    return _edit(
+        path,
+        create_if_missing,
+        _write_range_impl,
+        sheet_name=sheet_name,
+        start_cell=start_cell,
+        values=values,
+        create_if_missing=create_if_missing,
+    )
+
+
+def _append_rows_impl(
+    wb: Workbook, sheet_name: str, values: list[list[Any]], create_if_missing: bool = True
+) -> dict[str, Any]:
+    _check_rows(values)
     ws = _ensure_sheet(wb, sheet_name, create_if_missing=create_if_missing)
+    start_row = ws._current_row + 1
+    for row_values in values:
+        ws.append(row_values)
+    return {"sheet_name": sheet_name, "start_row": start_row, "rows": len(values)}
 
-    start = ws[start_cell]
-    start_row = start.row
-    start_col = start.column
 
-    written_cells = 0
-    for r_idx, row_values in enumerate(values):
-        for c_idx, v in enumerate(row_values):
-            ws.cell(row=start_row + r_idx, column=start_col + c_idx, value=v)
-            written_cells += 1
+@mcp.tool()
+def append_rows(
+    file_path: str,
+    sheet_name: str,
+    values: list[list[Any]],
+    create_if_missing: bool = True,
+) -> dict[str, Any]:
+    """Append rows after the last used row of a sheet.
+
+    A new workbook is streamed with openpyxl's write-only mode and saved at once, so the
+    rows are never held as in-memory cells; such a workbook contains only sheet_name.
+    Existing workbooks are appended to through the regular cached workbook.
+    """
+    _validate_sheet_name(sheet_name)
+    path = _safe_path(file_path)
+    with _path_lock(path):
+        if _cached_workbook(path) is None and not path.exists():
+            if not create_if_missing:
+                raise FileNotFoundError(f"Workbook not found: {path}")
+            with _WB_LOCK:
+                _WB_CACHE.pop(path, None)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            wb = Workbook(write_only=True)
+            ws = wb.create_sheet(title=sheet_name)
+            for row_values in values:
+                ws.append(row_values)
+            _save_workbook(wb, path)
+            return {"file_path": str(path), "sheet_name": sheet_name, "start_row": 1, "rows": len(values), "saved": True}
 
-    wb.save(path)
+        return _edit(
+            path,
+            create_if_missing,
+            _append_rows_impl,
+            sheet_name=sheet_name,
+            values=values,
+            create_if_missing=create_if_missing,
+        )
 
-    return {
-        "file_path": str(path),
-        "sheet_name": sheet_name,
-        "start_cell": start_cell,
-        "rows": len(values),
-        "written_cells": written_cells,
-        "saved": True,
-    }
+
+def _check_idx_amount(idx: int, amount: int) -> None:
+    if idx < 1 or amount < 1:
+        raise ValueError("idx and amount must be >= 1")
+
+
+def _insert_rows_impl(
+    wb: Workbook, sheet_name: str, idx: int, amount: int = 1, create_if_missing: bool = False
+) -> dict[str, Any]:
+    _check_idx_amount(idx, amount)
+    ws = _ensure_sheet(wb, sheet_name, create_if_missing=create_if_missing)
+    ws.insert_rows(idx=idx, amount=amount)
+    return {"sheet_name": sheet_name, "idx": idx, "amount": amount}
 
 
 @mcp.tool()
@@ -162,14 +915,26 @@ def insert_rows(
     create_if_missing: bool = False,
 ) -> dict[str, Any]:
     """Insert rows before idx (1-based)."""
-    if idx < 1 or amount < 1:
-        raise ValueError("idx and amount must be >= 1")
+    _check_idx_amount(idx, amount)
     path = _safe_path(file_path)
-    wb = _load_or_create_workbook(path, create_if_missing=create_if_missing)
+    return _edit(
+        path,
+        create_if_missing,
+        _insert_rows_impl,
+        sheet_name=sheet_name,
+        idx=idx,
+        amount=amount,
+        create_if_missing=create_if_missing,
+    )
+
+
+def _delete_rows_impl(
+    wb: Workbook, sheet_name: str, idx: int, amount: int = 1, create_if_missing: bool = False
+) -> dict[str, Any]:
+    _check_idx_amount(idx, amount)
     ws = _ensure_sheet(wb, sheet_name, create_if_missing=create_if_missing)
-    ws.insert_rows(idx=idx, amount=amount)
-    wb.save(path)
-    return {"file_path": str(path), "sheet_name": sheet_name, "idx": idx, "amount": amount, "saved": True}
+    ws.delete_rows(idx=idx, amount=amount)
+    return {"sheet_name": sheet_name, "idx": idx, "amount": amount}
 
 
 @mcp.tool()
@@ -181,14 +946,26 @@ def delete_rows(
     create_if_missing: bool = False,
 ) -> dict[str, Any]:
     """Delete rows from idx (1-based)."""
-    if idx < 1 or amount < 1:
-        raise ValueError("idx and amount must be >= 1")
+    _check_idx_amount(idx, amount)
     path = _safe_path(file_path)
-    wb = _load_or_create_workbook(path, create_if_missing=create_if_missing)
+    return _edit(
+        path,
+        create_if_missing,
+        _delete_rows_impl,
+        sheet_name=sheet_name,
+        idx=idx,
+        amount=amount,
+        create_if_missing=create_if_missing,
+    )
+
+
+def _insert_columns_impl(
+    wb: Workbook, sheet_name: str, idx: int, amount: int = 1, create_if_missing: bool = False
+) -> dict[str, Any]:
+    _check_idx_amount(idx, amount)
     ws = _ensure_sheet(wb, sheet_name, create_if_missing=create_if_missing)
-    ws.delete_rows(idx=idx, amount=amount)
-    wb.save(path)
-    return {"file_path": str(path), "sheet_name": sheet_name, "idx": idx, "amount": amount, "saved": True}
+    ws.insert_cols(idx=idx, amount=amount)
+    return {"sheet_name": sheet_name, "idx": idx, "amount": amount}
 
 
 @mcp.tool()
@@ -200,14 +977,26 @@ def insert_columns(
     create_if_missing: bool = False,
 ) -> dict[str, Any]:
     """Insert columns before idx (1-based)."""
-    if idx < 1 or amount < 1:
-        raise ValueError("idx and amount must be >= 1")
+    _check_idx_amount(idx, amount)
     path = _safe_path(file_path)
-    wb = _load_or_create_workbook(path, create_if_missing=create_if_missing)
+    return _edit(
+        path,
+        create_if_missing,
+        _insert_columns_impl,
+        sheet_name=sheet_name,
+        idx=idx,
+        amount=amount,
+        create_if_missing=create_if_missing,
+    )
+
+
+def _delete_columns_impl(
+    wb: Workbook, sheet_name: str, idx: int, amount: int = 1, create_if_missing: bool = False
+) -> dict[str, Any]:
+    _check_idx_amount(idx, amount)
     ws = _ensure_sheet(wb, sheet_name, create_if_missing=create_if_missing)
-    ws.insert_cols(idx=idx, amount=amount)
-    wb.save(path)
-    return {"file_path": str(path), "sheet_name": sheet_name, "idx": idx, "amount": amount, "saved": True}
+    ws.delete_cols(idx=idx, amount=amount)
+    return {"sheet_name": sheet_name, "idx": idx, "amount": amount}
 
 
 @mcp.tool()
@@ -219,14 +1008,27 @@ def delete_columns(
     create_if_missing: bool = False,
 ) -> dict[str, Any]:
     """Delete columns from idx (1-based)."""
-    if idx < 1 or amount < 1:
-        raise ValueError("idx and amount must be >= 1")
+    _check_idx_amount(idx, amount)
     path = _safe_path(file_path)
-    wb = _load_or_create_workbook(path, create_if_missing=create_if_missing)
-    ws = _ensure_sheet(wb, sheet_name, create_if_missing=create_if_missing)
-    ws.delete_cols(idx=idx, amount=amount)
-    wb.save(path)
-    return {"file_path": str(path), "sheet_name": sheet_name, "idx": idx, "amount": amount, "saved": True}
+    return _edit(
+        path,
+        create_if_missing,
+        _delete_columns_impl,
+        sheet_name=sheet_name,
+        idx=idx,
+        amount=amount,
+        create_if_missing=create_if_missing,
+    )
+
+
+def _rename_sheet_impl(wb: Workbook, old_name: str, new_name: str) -> dict[str, Any]:
+    _validate_sheet_name(new_name)
+    if old_name not in wb.sheetnames:
+        raise ValueError(f"Sheet not found: {old_name}")
+    if new_name in wb.sheetnames:
+        raise ValueError(f"Sheet already exists: {new_name}")
+    wb[old_name].title = new_name
+    return {"old_name": old_name, "new_name": new_name}
 
 
 @mcp.tool()
@@ -238,28 +1040,51 @@ def rename_sheet(
     """Rename a worksheet."""
     _validate_sheet_name(new_name)
     path = _safe_path(file_path)
-    wb = _load_or_create_workbook(path, create_if_missing=False)
-    if old_name not in wb.sheetnames:
-        raise ValueError(f"Sheet not found: {old_name}")
-    if new_name in wb.sheetnames:
-        raise ValueError(f"Sheet already exists: {new_name}")
-    wb[old_name].title = new_name
-    wb.save(path)
-    return {"file_path": str(path), "old_name": old_name, "new_name": new_name, "saved": True}
+    return _edit(path, False, _rename_sheet_impl, old_name=old_name, new_name=new_name)
 
 
-@mcp.tool()
-def delete_sheet(file_path: str, sheet_name: str) -> dict[str, Any]:
-    """Delete a worksheet (must leave at least one sheet)."""
-    path = _safe_path(file_path)
-    wb = _load_or_create_workbook(path, create_if_missing=False)
+def _delete_sheet_impl(wb: Workbook, sheet_name: str) -> dict[str, Any]:
     if sheet_name not in wb.sheetnames:
         raise ValueError(f"Sheet not found: {sheet_name}")
     if len(wb.sheetnames) == 1:
         raise ValueError("Cannot delete the only sheet in workbook")
     del wb[sheet_name]
-    wb.save(path)
-    return {"file_path": str(path), "deleted_sheet": sheet_name, "remaining_sheets": wb.sheetnames, "saved": True}
+    return {"deleted_sheet": sheet_name, "remaining_sheets": wb.sheetnames}
+
+
+@mcp.tool()
+def delete_sheet(file_path: str, sheet_name: str) -> dict[str, Any]:
+    """Delete a worksheet (must leave at least one sheet)."""
+    path = _safe_path(file_path)
+    return _edit(path, False, _delete_sheet_impl, sheet_name=sheet_name)
+
+
+def _clear_range_impl(wb: Workbook, sheet_name: str, cell_range: str, create_if_missing: bool = False) -> dict[str, Any]:
+    bounds = _parse_range(cell_range)
+    ws = _ensure_sheet(wb, sheet_name, create_if_missing=create_if_missing)
+    min_col, min_row, max_col, max_row = _resolve_bounds(bounds, ws)
+    # Only touch cells that already exist; iter_rows would create every missing one.
+    ws_cells = ws._cells
+    if (max_row - min_row + 1) * (max_col - min_col + 1) > len(ws_cells):
+        # Sparse sheet: scanning the populated cells is cheaper than every coordinate in the box.
+        targets = [
+            cell
+            for (row, col), cell in ws_cells.items()
+            if min_row <= row <= max_row and min_col <= col <= max_col
+        ]
+    else:
+        targets = [
+            ws_cells[(row, col)]
+            for row in range(min_row, max_row + 1)
+            for col in range(min_col, max_col + 1)
+            if (row, col) in ws_cells
+        ]
+    cleared_cells = 0
+    for cell in targets:
+        if cell.value is not None:
+            cell.value = None
+            cleared_cells += 1
+    return {"sheet_name": sheet_name, "cell_range": cell_range, "cleared_cells": cleared_cells}
 
 
 @mcp.tool()
@@ -271,23 +1096,86 @@ def clear_range(
 ) -> dict[str, Any]:
     """Clear values in a range like A1:C10."""
     path = _safe_path(file_path)
-    wb = _load_or_create_workbook(path, create_if_missing=create_if_missing)
+    return _edit(
+        path,
+        create_if_missing,
+        _clear_range_impl,
+        sheet_name=sheet_name,
+        cell_range=cell_range,
+        create_if_missing=create_if_missing,
+    )
+
+
+def _format_range_impl(
+    wb: Workbook,
+    sheet_name: str,
+    cell_range: str,
+    bold: bool | None = None,
+    wrap_text: bool | None = None,
+    horizontal: str | None = None,
+    vertical: str | None = None,
+    number_format: str | None = None,
+    fill_hex: str | None = None,
+    create_if_missing: bool = False,
+) -> dict[str, Any]:
+    bounds = _parse_range(cell_range)
+    pattern_fill = None
+    if fill_hex is not None:
+        pattern_fill = PatternFill(fill_type="solid", fgColor=_normalize_hex_color(fill_hex))
+    # Build throwaway styles once so invalid options fail before any cell is changed.
+    Font(bold=bold)
+    Alignment(horizontal=horizontal, vertical=vertical, wrap_text=wrap_text)
     ws = _ensure_sheet(wb, sheet_name, create_if_missing=create_if_missing)
-    min_col, min_row, max_col, max_row = range_boundaries(cell_range)
-    cleared_cells = 0
+    min_col, min_row, max_col, max_row = _resolve_bounds(bounds, ws)
+
+    # Loop invariants, evaluated once rather than per cell.
+    do_font = bold is not None
+    do_alignment = wrap_text is not None or horizontal is not None or vertical is not None
+    do_number_format = number_format is not None
+    do_fill = pattern_fill is not None
+
+    # Cells sharing a base style share one derived style object, keyed by the workbook style id.
+    fonts: dict[int, Font] = {}
+    alignments: dict[int, Alignment] = {}
+    updated_cells = 0
     for row in ws.iter_rows(min_row=min_row, max_row=max_row, min_col=min_col, max_col=max_col):
         for cell in row:
-            if cell.value is not None:
-                cell.value = None
-                cleared_cells += 1
-    wb.save(path)
-    return {
-        "file_path": str(path),
-        "sheet_name": sheet_name,
-        "cell_range": cell_range,
-        "cleared_cells": cleared_cells,
-        "saved": True,
-    }
+            style = cell._style  # None until the cell is first styled, i.e. style id 0
+            if do_font:
+                font_id = style.fontId if style else 0
+                new_font = fonts.get(font_id)
+                if new_font is None:
+                    base_font = cell.font or Font()
+                    new_font = fonts[font_id] = Font(
+                        name=base_font.name,
+                        sz=base_font.sz,
+                        italic=base_font.italic,
+                        color=base_font.color,
+                        underline=base_font.underline,
+                        strike=base_font.strike,
+                        bold=bold,
+                    )
+                cell.font = new_font
+            if do_alignment:
+                alignment_id = style.alignmentId if style else 0
+                new_alignment = alignments.get(alignment_id)
+                if new_alignment is None:
+                    base_alignment = cell.alignment or Alignment()
+                    new_alignment = alignments[alignment_id] = Alignment(
+                        horizontal=horizontal if horizontal is not None else base_alignment.horizontal,
+                        vertical=vertical if vertical is not None else base_alignment.vertical,
+                        wrap_text=wrap_text if wrap_text is not None else base_alignment.wrap_text,
+                        text_rotation=base_alignment.text_rotation,
+                        shrink_to_fit=base_alignment.shrink_to_fit,
+                        indent=base_alignment.indent,
+                    )
+                cell.alignment = new_alignment
+            if do_number_format:
+                cell.number_format = number_format
+            if do_fill:
+                cell.fill = pattern_fill
+            updated_cells += 1
+    return {"sheet_name": sheet_name, "cell_range": cell_range, "updated_cells": updated_cells}
 
 
 @mcp.tool()
@@ -305,49 +1193,145 @@ def format_range(
 ) -> dict[str, Any]:
     """Format cells in a range. fill_hex example: 'EAF2FF'."""
     path = _safe_path(file_path)
-    wb = _load_or_create_workbook(path, create_if_missing=create_if_missing)
-    ws = _ensure_sheet(wb, sheet_name, create_if_missing=create_if_missing)
-    min_col, min_row, max_col, max_row = range_boundaries(cell_range)
-    updated_cells = 0
-    for row in ws.iter_rows(min_row=min_row, max_row=max_row, min_col=min_col, max_col=max_col):
-        for cell in row:
-            if bold is not None:
-                base_font = cell.font or Font()
-                cell.font = Font(
-                    name=base_font.name,
-                    sz=base_font.sz,
-                    italic=base_font.italic,
-                    color=base_font.color,
-                    underline=base_font.underline,
-                    strike=base_font.strike,
-                    bold=bold,
-                )
-            if any(v is not None for v in (wrap_text, horizontal, vertical)):
-                base_alignment = cell.alignment or Alignment()
-                cell.alignment = Alignment(
-                    horizontal=horizontal if horizontal is not None else base_alignment.horizontal,
-                    vertical=vertical if vertical is not None else base_alignment.vertical,
-                    wrap_text=wrap_text if wrap_text is not None else base_alignment.wrap_text,
-                    text_rotation=base_alignment.text_rotation,
-                    shrink_to_fit=base_alignment.shrink_to_fit,
-                    indent=base_alignment.indent,
-                )
-            if number_format is not None:
-                cell.number_format = number_format
-            if fill_hex is not None:
-                color = fill_hex.strip().lstrip("#")
-                if len(color) != 6:
-                    raise ValueError("fill_hex must be 6 hex characters, e.g. EAF2FF")
-                cell.fill = PatternFill(fill_type="solid", fgColor=color.upper())
-            updated_cells += 1
-    wb.save(path)
-    return {
-        "file_path": str(path),
-        "sheet_name": sheet_name,
-        "cell_range": cell_range,
-        "updated_cells": updated_cells,
-        "saved": True,
-    }
+    return _edit(
+        path,
+        create_if_missing,
+        _format_range_impl,
+        sheet_name=sheet_name,
+        cell_range=cell_range,
+        bold=bold,
+        wrap_text=wrap_text,
+        horizontal=horizontal,
+        vertical=vertical,
+        number_format=number_format,
+        fill_hex=fill_hex,
+        create_if_missing=create_if_missing,
+    )
+
+
+_OPS: dict[str, Callable[..., dict[str, Any]]] = {
+    "write_cell": _write_cell_impl,
+    "write_range": _write_range_impl,
+    "append_rows": _append_rows_impl,
+    "insert_rows": _insert_rows_impl,
+    "delete_rows": _delete_rows_impl,
+    "insert_columns": _insert_columns_impl,
+    "delete_columns": _delete_columns_impl,
+    "rename_sheet": _rename_sheet_impl,
+    "delete_sheet": _delete_sheet_impl,
+    "clear_range": _clear_range_impl,
+    "format_range": _format_range_impl,
+}
+_OP_SIGNATURES = {name: inspect.signature(impl) for name, impl in _OPS.items()}
+
+
+def _op_call(index: int, op: dict[str, Any]) -> tuple[Callable[..., dict[str, Any]], dict[str, Any]]:
+    """Look up one op's impl and check its arguments, before any workbook is touched."""
+    arguments = dict(op)
+    name = arguments.pop("op", None)
+    impl = _OPS.get(name)
+    if impl is None:
+        raise ValueError(f"Unsupported op at index {index}: {name!r}; expected one of {sorted(_OPS)}")
+    try:
+        _OP_SIGNATURES[name].bind(None, **arguments)
+    except TypeError as exc:
+        raise ValueError(f"Invalid arguments for op at index {index} ({name}): {exc}") from exc
+    return impl, arguments
+
+
+@mcp.tool()
+def apply_ops(file_path: str, ops: list[dict[str, Any]], create_if_missing: bool = True) -> dict[str, Any]:
+    """Run several edits on one workbook with a single load and save.
+
+    Each op names an edit tool plus its arguments, without file_path, for example
+    {"op": "insert_rows", "sheet_name": "Data", "idx": 2, "amount": 1}.
+    Ops run in order and are applied all or nothing: if one fails, the edits of the ops
+    before it are rolled back too.
+    """
+    calls = [_op_call(index, op) for index, op in enumerate(ops)]
+    path = _safe_path(file_path)
+    with _workbook(path, create_if_missing=create_if_missing, atomic=len(calls) > 1) as wb:
+        results = [impl(wb, **arguments) for impl, arguments in calls]
+        saved = _mark_dirty(path) if calls else False
+    return {"file_path": str(path), "results": results, "saved": saved}
+
+
+@mcp.tool()
+def flush(file_path: str, discard: bool = False) -> dict[str, Any]:
+    """Save pending edits to disk and release the cached workbook.
+
+    discard=True drops pending edits instead, e.g. after the file was changed by another program.
+    """
+    path = _safe_path(file_path)
+    with _path_lock(path):
+        saved = False if discard else _save_if_dirty(path)
+        with _WB_LOCK:
+            _WB_CACHE.pop(path, None)
+    return {"file_path": str(path), "saved": saved}
+
+
+# (position in the request, op impl, its keyword arguments)
+_BatchItem = tuple[int, Callable[..., dict[str, Any]], dict[str, Any]]
+
+
+def _run_batch_group(
+    path: Path, items: list[_BatchItem]
+) -> tuple[list[tuple[int, dict[str, Any]]], dict[str, Any] | None]:
+    """Apply one workbook's operations all or nothing and save it once.
+
+    Returns the per-operation results, or an error entry if any operation or the save failed.
+    """
+    # The first operation decides whether a missing workbook is created, as it would on its own.
+    _, first_impl, first_arguments = items[0]
+    parameter = inspect.signature(first_impl).parameters.get("create_if_missing")
+    create_workbook = first_arguments.get("create_if_missing", parameter.default if parameter else False)
+    failed_index = None
+    try:
+        with _workbook(path, create_if_missing=create_workbook, atomic=True) as wb:
+            results = []
+            for index, impl, arguments in items:
+                failed_index = index
+                results.append((index, impl(wb, **arguments)))
+            failed_index = None
+            _mark_dirty(path, save_now=True)
+    except Exception as exc:
+        return [], {"file_path": str(path), "index": failed_index, "error": f"{type(exc).__name__}: {exc}"}
+    return results, None
+
+
+@mcp.tool()
+def batch_apply(operations: list[dict[str, Any]]) -> dict[str, Any]:
+    """Apply many edits across workbooks, one worker thread per workbook.
+
+    Each operation names an edit tool plus its arguments, for example
+    {"op": "write_cell", "file_path": "a.xlsx", "sheet_name": "Data", "cell": "A1", "value": 1}.
+    Operations on the same workbook run in order, all or nothing, and the workbook is saved
+    once at the end. If one of them (or the save) fails, that workbook keeps none of the
+    batch's edits, its results stay None, and errors gets {"file_path", "index", "error"},
+    where index is the failing operation (None if the save failed). Other workbooks are
+    unaffected; "saved" is True only if every workbook was saved.
+    """
+    groups: dict[Path, list[_BatchItem]] = {}
+    for index, operation in enumerate(operations):
+        operation = dict(operation)
+        file_path = operation.pop("file_path", None)
+        if file_path is None:
+            raise ValueError(f"Operation {index} is missing file_path")
+        impl, arguments = _op_call(index, operation)
+        groups.setdefault(_safe_path(file_path), []).append((index, impl, arguments))
+
+    results: list[dict[str, Any] | None] = [None] * len(operations)
+    errors: list[dict[str, Any]] = []
+    if groups:
+        with ThreadPoolExecutor(max_workers=min(os.cpu_count() or 1, len(groups))) as pool:
+            futures = {path: pool.submit(_run_batch_group, path, items) for path, items in groups.items()}
+            for path, future in futures.items():
+                group_results, error = future.result()
+                if error is not None:
+                    errors.append(error)
+                for index, result in group_results:
+                    results[index] = {"file_path": str(path), **result, "saved": True}
+    return {"results": results, "files": [str(path) for path in groups], "errors": errors, "saved": not errors}
 
 
 def main() -> None:
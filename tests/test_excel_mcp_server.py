@@ -1,20 +1,33 @@
 from __future__ import annotations
 
+import functools
+import os
+import zipfile
 from pathlib import Path
 
 import pytest
+from openpyxl import Workbook, load_workbook
 
+import excel_mcp_server
 from excel_mcp_server import (
+    WorkbookConflictError,
+    _flush_all,
+    _write_cell_in_place,
+    append_rows,
+    apply_ops,
+    batch_apply,
     clear_range,
     delete_columns,
     delete_rows,
     delete_sheet,
+    flush,
     format_range,
     insert_columns,
     insert_rows,
     list_sheets,
     read_range,
     rename_sheet,
+    set_workspace_root,
     write_cell,
     write_range,
 )
@@ -31,6 +44,16 @@ def test_security_workspace_boundary(monkeypatch: pytest.MonkeyPatch, tmp_path:
         list_sheets(_p(outside))
 
 
+def test_set_workspace_root(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("EXCEL_MCP_ROOT", _p(tmp_path))
+    inner = tmp_path / "inner"
+    inner.mkdir()
+    assert set_workspace_root(_p(inner)) == inner.resolve()
+    with pytest.raises(ValueError):
+        list_sheets(_p(tmp_path / "sibling.xlsx"), create_if_missing=True)
+    assert list_sheets(_p(inner / "ok.xlsx"), create_if_missing=True)["sheets"] == ["Sheet"]
+
+
 def test_security_extension(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
     monkeypatch.setenv("EXCEL_MCP_ROOT", _p(tmp_path))
     bad = tmp_path / "bad.xls"
@@ -85,9 +108,366 @@ def test_sheet_and_format_ops(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -
         horizontal="center",
         fill_hex="EAF2FF",
     )
+    with pytest.raises(ValueError):
+        format_range(file_path=file_path, sheet_name="Report", cell_range="A1:A1", fill_hex="#EAF2FG")
     delete_sheet(file_path=file_path, sheet_name="Extra")
 
     sheets = list_sheets(file_path=file_path)["sheets"]
     assert "Report" in sheets
     assert "Extra" not in sheets
     assert read_range(file_path=file_path, sheet_name="Report", cell_range="A2:A2")["values"][0][0] is None
+
+
+def test_cached_edits_are_saved_on_flush(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("EXCEL_MCP_ROOT", _p(tmp_path))
+    monkeypatch.setenv("EXCEL_MCP_SAVE_DELAY", "3600")
+    file_path = _p(tmp_path / "cached.xlsx")
+
+    assert write_cell(file_path=file_path, sheet_name="Data", cell="A1", value="pending")["saved"] is False
+    assert read_range(file_path=file_path, sheet_name="Data", cell_range="A1:A1")["values"] == [["pending"]]
+    assert "Data" not in load_workbook(file_path).sheetnames
+
+    assert flush(file_path=file_path)["saved"] is True
+    assert load_workbook(file_path)["Data"]["A1"].value == "pending"
+    assert flush(file_path=file_path)["saved"] is False
+
+
+def test_failed_call_writes_nothing(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("EXCEL_MCP_ROOT", _p(tmp_path))
+    monkeypatch.setenv("EXCEL_MCP_SAVE_DELAY", "3600")
+    file_path = _p(tmp_path / "rollback.xlsx")
+
+    write_cell(file_path=file_path, sheet_name="Data", cell="A1", value="pending")
+    with pytest.raises(ValueError):
+        write_range(file_path=file_path, sheet_name="Data", start_cell="E1", values=[["ok1", "ok2"], [{"bad": 1}]])
+    assert read_range(file_path=file_path, sheet_name="Data", cell_range="A1:F1")["values"] == [
+        ["pending", None, None, None, None, None]
+    ]
+    with pytest.raises(ValueError):
+        format_range(file_path=file_path, sheet_name="Data", cell_range="A1:B1", bold=True, horizontal="sideways")
+    with pytest.raises(ValueError):
+        write_cell(file_path=file_path, sheet_name="Fresh", cell="A1", value={"bad": 1})
+    assert list_sheets(file_path=file_path)["sheets"] == ["Sheet", "Data"]
+    flush(file_path=file_path)
+    ws = load_workbook(file_path)["Data"]
+    assert ws["A1"].value == "pending"
+    assert ws["E1"].value is None and ws["F1"].value is None
+    assert not ws["A1"].font.b
+
+    # Without pending edits the failed call is undone by reloading the saved file.
+    with pytest.raises(ValueError):
+        write_range(file_path=file_path, sheet_name="Data", start_cell="E1", values=[["ok1", "ok2"], [{"bad": 1}]])
+    assert read_range(file_path=file_path, sheet_name="Data", cell_range="E1:F1")["values"] == [[None, None]]
+
+
+def test_debounced_edits_serialize_once(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("EXCEL_MCP_ROOT", _p(tmp_path))
+    monkeypatch.setenv("EXCEL_MCP_SAVE_DELAY", "3600")
+    file_path = _p(tmp_path / "debounced.xlsx")
+    write_cell(file_path=file_path, sheet_name="Data", cell="A1", value="first")
+
+    saves = []
+    original_save = Workbook.save
+    monkeypatch.setattr(Workbook, "save", lambda wb, filename: saves.append(filename) or original_save(wb, filename))
+    for row in range(2, 12):
+        write_cell(file_path=file_path, sheet_name="Data", cell=f"A{row}", value=f"row {row}")
+    assert saves == []
+    flush(file_path=file_path)
+    assert len(saves) == 1
+
+
+def test_flush_all_keeps_saving_after_a_failure(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("EXCEL_MCP_ROOT", _p(tmp_path))
+    monkeypatch.setenv("EXCEL_MCP_SAVE_DELAY", "3600")
+    locked, other = _p(tmp_path / "locked.xlsx"), _p(tmp_path / "other.xlsx")
+    for file_path in (locked, other):
+        write_cell(file_path=file_path, sheet_name="Data", cell="A1", value="pending")
+
+    save_workbook = excel_mcp_server._save_workbook
+
+    def failing_save(wb: Workbook, path: Path) -> None:
+        if str(path) == locked:
+            raise PermissionError(path)
+        save_workbook(wb, path)
+
+    monkeypatch.setattr(excel_mcp_server, "_save_workbook", failing_save)
+    _flush_all()
+    assert load_workbook(other)["Data"]["A1"].value == "pending"
+    assert "Data" not in load_workbook(locked).sheetnames
+
+    monkeypatch.setattr(excel_mcp_server, "_save_workbook", save_workbook)
+    assert flush(file_path=locked)["saved"] is True
+    assert load_workbook(locked)["Data"]["A1"].value == "pending"
+
+
+def _replace_externally(file_path: str, value: str) -> None:
+    wb = Workbook()
+    wb.active.title = "Data"
+    wb["Data"]["A1"] = value
+    wb.save(file_path)
+    stat = os.stat(file_path)
+    os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_external_change_conflicts_with_pending_edits(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("EXCEL_MCP_ROOT", _p(tmp_path))
+    monkeypatch.setenv("EXCEL_MCP_SAVE_DELAY", "3600")
+    file_path = _p(tmp_path / "conflict.xlsx")
+
+    # External change first, then a call: the pending edit is reported, not reloaded over.
+    write_cell(file_path=file_path, sheet_name="Data", cell="B1", value="pending")
+    _replace_externally(file_path, "external")
+    with pytest.raises(WorkbookConflictError):
+        read_range(file_path=file_path, sheet_name="Data", cell_range="B1:B1")
+    with pytest.raises(WorkbookConflictError):
+        write_cell(file_path=file_path, sheet_name="Data", cell="C1", value="more")
+    with pytest.raises(WorkbookConflictError):
+        flush(file_path=file_path)
+    assert flush(file_path=file_path, discard=True)["saved"] is False
+    assert read_range(file_path=file_path, sheet_name="Data", cell_range="A1:B1")["values"] == [["external", None]]
+
+    # External change first, then the debounced save: the external file is kept.
+    write_cell(file_path=file_path, sheet_name="Data", cell="B1", value="pending")
+    _replace_externally(file_path, "external again")
+    _flush_all()
+    assert load_workbook(file_path)["Data"]["A1"].value == "external again"
+    with pytest.raises(WorkbookConflictError):
+        read_range(file_path=file_path, sheet_name="Data", cell_range="B1:B1")
+    flush(file_path=file_path, discard=True)
+
+
+def test_read_range_values_keep_range_shape(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("EXCEL_MCP_ROOT", _p(tmp_path))
+    file_path = _p(tmp_path / "shape.xlsx")
+
+    write_range(file_path=file_path, sheet_name="Data", start_cell="A3", values=[["x", True, 2.5]])
+    write_range(file_path=file_path, sheet_name="Data", start_cell="B2", values=[[1, "=B2+1"], [3, 4.5]])
+    expected = [[None, None, None], [None, 1, "=B2+1"], ["x", 3, 4.5]]
+    assert read_range(file_path=file_path, sheet_name="Data", cell_range="A1:C3")["values"] == expected
+    assert read_range(file_path=file_path, sheet_name="Data", cell_range="B2")["values"] == [[1]]
+
+    assert read_range(file_path=file_path, sheet_name="Data", cell_range="C3:A1")["values"] == expected
+    with pytest.raises(ValueError):
+        read_range(file_path=file_path, sheet_name="Data", cell_range="A1:B")
+
+    flush(file_path=file_path)
+    assert read_range(file_path=file_path, sheet_name="Data", cell_range="A1:C3")["values"] == expected
+    assert read_range(file_path=file_path, sheet_name="Data", cell_range="B2")["values"] == [[1]]
+
+
+def test_read_range_open_ended_ignores_stale_dimension(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("EXCEL_MCP_ROOT", _p(tmp_path))
+    file_path = tmp_path / "stale.xlsx"
+    wb = Workbook()
+    wb.active.title = "Data"
+    for value in range(1, 6):
+        wb["Data"].append([value])
+    wb["Data"]["B2"] = "b"
+    wb["Data"]["D5"] = "d"
+    wb.save(file_path)
+
+    # Other writers often leave <dimension> at A1; read-only openpyxl trusts it.
+    with zipfile.ZipFile(file_path) as archive:
+        members = {info: archive.read(info) for info in archive.infolist()}
+    with zipfile.ZipFile(file_path, "w") as archive:
+        for info, data in members.items():
+            if info.filename == "xl/worksheets/sheet1.xml":
+                data = data.replace(b'<dimension ref="A1:D5"/>', b'<dimension ref="A1"/>')
+            archive.writestr(info, data)
+
+    read = functools.partial(read_range, file_path=_p(file_path), sheet_name="Data")
+    assert read(cell_range="A:A")["values"] == [[1], [2], [3], [4], [5]]
+    assert read(cell_range="1:2")["values"] == [[1, None, None, None], [2, "b", None, None]]
+    assert read(cell_range="A4:B6")["values"] == [[4, None], [5, None], [None, None]]
+
+    # Row-only ranges span the sheet's used width, whether read from disk or from the cache.
+    ranges = ("1:1", "2:4", "A:A")
+    from_disk = [read(cell_range=cell_range)["values"] for cell_range in ranges]
+    write_cell(file_path=_p(file_path), sheet_name="Data", cell="A1", value=1)
+    assert [read(cell_range=cell_range)["values"] for cell_range in ranges] == from_disk
+    assert from_disk[1] == [[2, "b", None, None], [3, None, None, None], [4, None, None, None]]
+
+
+def test_append_rows(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("EXCEL_MCP_ROOT", _p(tmp_path))
+    file_path = _p(tmp_path / "append.xlsx")
+
+    assert append_rows(file_path=file_path, sheet_name="Log", values=[["ts", "msg"], [1, "a"]])["start_row"] == 1
+    assert list_sheets(file_path=file_path)["sheets"] == ["Log"]
+    assert append_rows(file_path=file_path, sheet_name="Log", values=[[2, "b"]])["start_row"] == 3
+    values = read_range(file_path=file_path, sheet_name="Log", cell_range="A1:B3")["values"]
+    assert values == [["ts", "msg"], [1, "a"], [2, "b"]]
+
+
+def test_calamine_reader(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    pytest.importorskip("python_calamine")
+    monkeypatch.setenv("EXCEL_MCP_ROOT", _p(tmp_path))
+    file_path = _p(tmp_path / "calamine.xlsx")
+
+    write_range(file_path=file_path, sheet_name="Data", start_cell="B2", values=[["x", 1.5]])
+    flush(file_path=file_path)
+    monkeypatch.setenv("EXCEL_MCP_READER", "calamine")
+
+    assert list_sheets(file_path=file_path)["sheets"] == ["Sheet", "Data"]
+    values = read_range(file_path=file_path, sheet_name="Data", cell_range="A1:C3")["values"]
+    assert values == [[None, None, None], [None, "x", 1.5], [None, None, None]]
+    with pytest.raises(ValueError):
+        read_range(file_path=file_path, sheet_name="Missing", cell_range="A1")
+
+    # Open-ended ranges on an empty sheet have the same shape as with openpyxl.
+    empty_ranges = ("A:A", "1:3", "B:C")
+    from_calamine = [read_range(file_path=file_path, sheet_name="Sheet", cell_range=r)["values"] for r in empty_ranges]
+    monkeypatch.setenv("EXCEL_MCP_READER", "openpyxl")
+    assert from_calamine == [read_range(file_path=file_path, sheet_name="Sheet", cell_range=r)["values"] for r in empty_ranges]
+    assert from_calamine[1] == [[None], [None], [None]]
+
+
+def test_batch_apply_saves_each_workbook(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("EXCEL_MCP_ROOT", _p(tmp_path))
+    monkeypatch.setenv("EXCEL_MCP_SAVE_DELAY", "3600")
+    first, second = _p(tmp_path / "first.xlsx"), _p(tmp_path / "second.xlsx")
+
+    result = batch_apply(
+        operations=[
+            {"op": "write_range", "file_path": first, "sheet_name": "Data", "start_cell": "A1", "values": [[1], [2]]},
+            {"op": "write_cell", "file_path": second, "sheet_name": "Data", "cell": "A1", "value": "x"},
+            {"op": "insert_rows", "file_path": first, "sheet_name": "Data", "idx": 1},
+        ]
+    )
+    assert [r["sheet_name"] for r in result["results"]] == ["Data", "Data", "Data"]
+    assert load_workbook(first)["Data"]["A2"].value == 1
+    assert load_workbook(second)["Data"]["A1"].value == "x"
+    with pytest.raises(ValueError):
+        batch_apply(operations=[{"op": "flush", "file_path": first}])
+
+
+def test_batch_apply_failed_workbook_keeps_nothing(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("EXCEL_MCP_ROOT", _p(tmp_path))
+    monkeypatch.setenv("EXCEL_MCP_SAVE_DELAY", "3600")
+    first, second = _p(tmp_path / "b1.xlsx"), _p(tmp_path / "b2.xlsx")
+    write_cell(file_path=first, sheet_name="Data", cell="B1", value="pending")
+
+    result = batch_apply(
+        operations=[
+            {"op": "write_cell", "file_path": first, "sheet_name": "Data", "cell": "A1", "value": "batch"},
+            {"op": "delete_sheet", "file_path": first, "sheet_name": "Missing"},
+            {"op": "write_cell", "file_path": second, "sheet_name": "Data", "cell": "A1", "value": "batch"},
+        ]
+    )
+    assert result["saved"] is False
+    assert result["errors"] == [{"file_path": first, "index": 1, "error": "ValueError: Sheet not found: Missing"}]
+    assert result["results"][:2] == [None, None]
+    assert result["results"][2]["saved"] is True
+
+    assert load_workbook(second)["Data"]["A1"].value == "batch"
+    assert load_workbook(first).sheetnames == ["Sheet"]
+    assert read_range(file_path=first, sheet_name="Data", cell_range="A1:B1")["values"] == [[None, "pending"]]
+
+
+def test_write_cell_scalar_on_saved_workbook(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("EXCEL_MCP_ROOT", _p(tmp_path))
+    monkeypatch.setenv("EXCEL_MCP_SAVE_DELAY", "0")
+    file_path = _p(tmp_path / "scalar.xlsx")
+
+    write_range(file_path=file_path, sheet_name="Data", start_cell="A1", values=[["label", 1, "text"]])
+    format_range(file_path=file_path, sheet_name="Data", cell_range="B1:B1", bold=True)
+    flush(file_path=file_path)
+
+    for cell, value in (("B1", 2.5), ("C1", 3), ("D4", True), ("A1", None)):
+        write_cell(file_path=file_path, sheet_name="Data", cell=cell, value=value)
+    flush(file_path=file_path)
+
+    ws = load_workbook(file_path)["Data"]
+    assert [c.value for c in ws[1]] == [None, 2.5, 3, None]
+    assert ws["D4"].value is True
+    assert ws["B1"].font.b is True
+
+    # A formula on any sheet may depend on the cell, so the in-place rewrite steps aside.
+    write_cell(file_path=file_path, sheet_name="Calc", cell="A1", value="=Data!B1*2")
+    assert _write_cell_in_place(Path(file_path), "Data", "B1", 7) is False
+
+    # With a debounce, scalar writes go to the cached workbook and are saved once.
+    monkeypatch.setenv("EXCEL_MCP_SAVE_DELAY", "3600")
+    for value in range(5):
+        assert write_cell(file_path=file_path, sheet_name="Data", cell="E1", value=value)["saved"] is False
+    assert load_workbook(file_path)["Data"]["E1"].value is None
+    assert flush(file_path=file_path)["saved"] is True
+    assert load_workbook(file_path)["Data"]["E1"].value == 4
+
+
+def test_write_cell_in_place_does_not_expand_entities(tmp_path: Path) -> None:
+    pytest.importorskip("lxml")
+    secret = tmp_path / "secret.txt"
+    secret.write_text("top secret")
+    file_path = tmp_path / "entity.xlsx"
+    wb = Workbook()
+    wb.active.title = "Data"
+    wb.save(file_path)
+
+    with zipfile.ZipFile(file_path) as archive:
+        members = {info: archive.read(info) for info in archive.infolist()}
+    with zipfile.ZipFile(file_path, "w") as archive:
+        for info, data in members.items():
+            if info.filename == "xl/worksheets/sheet1.xml":
+                data = (
+                    f'<?xml version="1.0"?><!DOCTYPE worksheet [<!ENTITY xxe SYSTEM "{secret.as_uri()}">]>'
+                    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                    '<row r="1"><c r="A1" t="inlineStr"><is><t>&xxe;</t></is></c></row></sheetData></worksheet>'
+                ).encode()
+            archive.writestr(info, data)
+    before = file_path.read_bytes()
+
+    assert _write_cell_in_place(file_path, "Data", "B1", 1) is False
+    assert file_path.read_bytes() == before
+
+
+def test_apply_ops_matches_individual_calls(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("EXCEL_MCP_ROOT", _p(tmp_path))
+    file_path = _p(tmp_path / "fused.xlsx")
+
+    result = apply_ops(
+        file_path=file_path,
+        ops=[
+            {"op": "write_range", "sheet_name": "Data", "start_cell": "A1", "values": [["name", "value"], ["gpu", 1]]},
+            {"op": "insert_rows", "sheet_name": "Data", "idx": 2, "amount": 1},
+            {"op": "write_cell", "sheet_name": "Data", "cell": "A2", "value": "inserted"},
+            {"op": "insert_columns", "sheet_name": "Data", "idx": 2, "amount": 1},
+            {"op": "write_cell", "sheet_name": "Data", "cell": "B1", "value": "new_col"},
+        ],
+    )
+    assert [r["sheet_name"] for r in result["results"]] == ["Data"] * 5
+
+    values = read_range(file_path=file_path, sheet_name="Data", cell_range="A1:C3")["values"]
+    assert values == [["name", "new_col", "value"], ["inserted", None, None], ["gpu", None, 1]]
+    with pytest.raises(ValueError):
+        apply_ops(file_path=file_path, ops=[{"op": "flush"}])
+    bad_ops = [
+        {"op": "write_cell", "sheet_name": "Data", "cell": "D1", "value": 1},
+        {"op": "write_cell", "sheet": "Data", "cell": "D2", "value": 2},
+    ]
+    with pytest.raises(ValueError, match=r"op at index 1 \(write_cell\)"):
+        apply_ops(file_path=file_path, ops=bad_ops)
+    with pytest.raises(ValueError, match="op at index 0"):
+        apply_ops(file_path=file_path, ops=[{"op": "clear_range", "file_path": file_path, "sheet_name": "Data"}])
+    assert read_range(file_path=file_path, sheet_name="Data", cell_range="D1:D1")["values"] == [[None]]
+
+
+def test_apply_ops_is_all_or_nothing(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("EXCEL_MCP_ROOT", _p(tmp_path))
+    monkeypatch.setenv("EXCEL_MCP_SAVE_DELAY", "3600")
+    file_path = _p(tmp_path / "atomic.xlsx")
+
+    write_cell(file_path=file_path, sheet_name="Data", cell="A1", value="pending")
+    with pytest.raises(ValueError, match="Sheet not found"):
+        apply_ops(
+            file_path=file_path,
+            ops=[
+                {"op": "write_cell", "sheet_name": "Data", "cell": "G1", "value": "first"},
+                {"op": "delete_sheet", "sheet_name": "Missing"},
+            ],
+        )
+    assert read_range(file_path=file_path, sheet_name="Data", cell_range="G1:G1")["values"] == [[None]]
+    flush(file_path=file_path)
+    ws = load_workbook(file_path)["Data"]
+    assert ws["A1"].value == "pending"
+    assert ws["G1"].value is None